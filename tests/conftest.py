@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# قبل از import main: همه مسیرهای نوشتنی داخل پوشه موقت و بدون MySQL
+_scratch = Path(tempfile.mkdtemp(prefix="messenger-tests-"))
+os.environ["FAST_START"] = "0"
+os.environ["STATE_FILE"] = str(_scratch / "state.json")
+os.environ["RECORDINGS_DIR"] = str(_scratch / "recordings")
+os.environ["CAPTURE_DIR"] = str(_scratch / "captures")
+os.environ["MEDIA_DIR"] = str(_scratch / "media")
+os.environ.pop("MYSQL_URL", None)
+os.environ.pop("DATABASE_URL", None)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def app_env(tmp_path, monkeypatch):
+    """دیتابیس SQLite و فایل‌های وضعیت تازه برای هر تست"""
+    monkeypatch.setattr(main, "DB_FILE", tmp_path / "data.db")
+    monkeypatch.setattr(main, "DATA_FILE", tmp_path / "data.json")
+    monkeypatch.setattr(main, "STATE_FILE", tmp_path / "state.json")
+    main.delivery.seen.clear()
+    main.search_limiter.counts.clear()
+    return tmp_path
+
+
+@pytest.fixture
+def client(app_env):
+    from fastapi.testclient import TestClient
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture
+def recv():
+    """خواندن فریم‌ها تا رسیدن نوع خواسته‌شده"""
+    def receive(ws, msg_type: str) -> dict:
+        while True:
+            data = json.loads(ws.receive_text())
+            if data["type"] == msg_type:
+                return data
+    return receive
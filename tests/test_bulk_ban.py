@@ -0,0 +1,77 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def admin(client):
+    """کلاینت با چند کاربر ثبت‌شده و کلید ادمین"""
+    users = [
+        ("10000001", "Sara One", "IR"),
+        ("10000002", "Sara Two", "IR"),
+        ("10000003", "Reza", "IR"),
+        ("10000004", "Sam", "DE"),
+    ]
+    for code, name, country in users:
+        r = client.post("/api/register", json={"code": code, "name": name, "country": country, "password": "1234"})
+        assert r.status_code == 200
+    key = client.portal.call(main.get_setting, "admin_code")
+    return client, key
+
+
+def bulk(client, key, path, body):
+    return client.post(f"/api/admin/{path}", params={"admin_key": key}, json=body)
+
+
+def test_filter_preview_selects_matching_users_only(admin):
+    client, key = admin
+    r = bulk(client, key, "bulk_ban", {"filter": {"name_prefix": "Sara"}, "preview": True}).json()
+    assert r["count"] == 2 and sorted(r["codes"]) == ["10000001", "10000002"]
+    r = bulk(client, key, "bulk_ban", {"filter": {"country": "DE"}, "preview": True}).json()
+    assert r["codes"] == ["10000004"]
+
+
+def test_support_account_is_never_bulk_banned(admin):
+    client, key = admin
+    r = bulk(client, key, "bulk_ban", {"filter": {"country": "IR"}, "preview": True}).json()
+    assert main.SUPPORT_CODE not in r["codes"]
+    # کد پشتیبانی از تنظیمات خوانده می‌شود، نه ثابت
+    client.portal.call(main.set_setting, "support_code", "10000003")
+    r = bulk(client, key, "bulk_ban", {"codes": ["10000003", "10000004"]}).json()
+    assert r["count"] == 1
+    assert client.portal.call(main.is_banned, "10000003")[0] is False
+    assert client.portal.call(main.is_banned, "10000004")[0] is True
+
+
+def test_unknown_codes_are_skipped(admin):
+    client, key = admin
+    r = bulk(client, key, "bulk_ban", {"codes": ["10000001", "99999999", "10000001"], "duration": "2", "reason": "spam"}).json()
+    assert r == {"success": True, "count": 1}
+    banned, reason = client.portal.call(main.is_banned, "10000001")
+    assert banned and reason == "spam"
+
+
+@pytest.mark.parametrize("body", [
+    {"codes": ["10000001"], "duration": "abc"},
+    {"codes": ["10000001"], "duration": -1},
+    {"filter": {}},
+    {"filter": {"country": ""}, "codes": None},
+    {"codes": [str(i) for i in range(main.BULK_MAX + 1)]},
+])
+def test_invalid_requests_are_rejected(admin, body):
+    client, key = admin
+    assert bulk(client, key, "bulk_ban", body).status_code == 400
+
+
+def test_requires_admin_key(admin):
+    client, _ = admin
+    assert bulk(client, "wrong", "bulk_ban", {"codes": ["10000001"]}).status_code == 403
+
+
+def test_bulk_unban_targets_banned_users(admin):
+    client, key = admin
+    bulk(client, key, "bulk_ban", {"filter": {"name_prefix": "Sara"}})
+    r = bulk(client, key, "bulk_unban", {"filter": {"country": "IR"}, "preview": True}).json()
+    assert sorted(r["codes"]) == ["10000001", "10000002"]
+    assert bulk(client, key, "bulk_unban", {"filter": {"country": "IR"}}).json()["count"] == 2
+    assert not any(client.portal.call(main.is_banned, c)[0] for c in ("10000001", "10000002"))
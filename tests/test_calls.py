@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import main
+from main import CallRecorder, CallRegistry, CallSession
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_start_accept_end_keeps_both_sides_indexed():
+    async def scenario():
+        calls = CallRegistry(ring_timeout=0)
+        session = calls.start("A", "B")
+        assert session.state == CallSession.RINGING
+        assert calls.get("A") is session and calls.get("B") is session and len(calls) == 1
+        assert calls.peer("A") is None  # تا پاسخ، صدا رله نمی‌شود
+        assert calls.accept("B", "X") is None
+        assert calls.accept("B", "A") is session and session.state == CallSession.ACTIVE
+        assert calls.peer("A") == "B" and calls.peer("B") == "A"
+        assert calls.end("B") is session and session.state == CallSession.ENDED
+        assert "A" not in calls and "B" not in calls and len(calls) == 0
+    run(scenario())
+
+
+def test_start_is_busy_when_either_side_is_in_another_call():
+    async def scenario():
+        calls = CallRegistry(ring_timeout=0)
+        first = calls.start("A", "B")
+        calls.accept("B", "A")
+        assert calls.start("A", "C") is None  # تماس‌گیرنده درگیر است
+        assert calls.start("C", "B") is None  # گیرنده درگیر است
+        assert calls.get("A") is first and first.state == CallSession.ACTIVE
+        assert calls.start("A", "A") is None and calls.start("A", "") is None
+        # تماس دوباره با همان طرف، جلسه قبلی را جایگزین می‌کند
+        again = calls.start("B", "A")
+        assert again is not first and first.state == CallSession.ENDED and calls.get("A") is again
+    run(scenario())
+
+
+def test_ring_timeout_ends_unanswered_call():
+    async def scenario():
+        calls = CallRegistry(ring_timeout=0.02)
+        session = calls.start("A", "B")
+        await asyncio.sleep(0.1)
+        assert session.state == CallSession.ENDED and len(calls) == 0
+        await asyncio.gather(*calls.tasks)
+    before = main.metrics["calls_ring_timeout"]
+    run(scenario())
+    assert main.metrics["calls_ring_timeout"] == before + 1
+
+
+def test_end_stops_the_call_recording(monkeypatch):
+    stopped = []
+    monkeypatch.setattr(main.recorder, "stop_call", stopped.append)
+
+    async def scenario():
+        calls = CallRegistry(ring_timeout=0)
+        calls.start("B", "A")
+        calls.accept("A", "B")
+        calls.end("A")
+    run(scenario())
+    assert stopped == [CallRecorder.call_key("A", "B")]
+
+
+def test_busy_rejection_over_websocket(client, recv):
+    with client.websocket_connect("/ws/11112222/a") as a, \
+            client.websocket_connect("/ws/33334444/b") as b, \
+            client.websocket_connect("/ws/55556666/c") as c:
+        for ws in (a, b, c):
+            recv(ws, "session")
+        a.send_text(json.dumps({"type": "call_request", "to": "33334444"}))
+        recv(a, "call_ringing")
+        recv(b, "incoming_call")
+        c.send_text(json.dumps({"type": "call_request", "to": "33334444"}))
+        assert recv(c, "call_rejected")["reason"] == "busy"
+        a.send_text(json.dumps({"type": "call_request", "to": "55556666"}))
+        assert recv(a, "call_rejected")["reason"] == "busy"
+        assert main.active_calls.get("33334444").caller == "11112222"
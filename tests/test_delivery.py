@@ -0,0 +1,59 @@
+import json
+
+import main
+from main import DeliveryTracker
+
+
+def send(ws, **frame):
+    ws.send_text(json.dumps(frame))
+
+
+def test_live_message_is_acked_sent_and_duplicates_are_not_relayed(client, recv):
+    with client.websocket_connect("/ws/11112222/a") as a, client.websocket_connect("/ws/33334444/b") as b:
+        recv(a, "session")
+        recv(b, "session")
+        deduped = main.metrics["messages_deduped"]
+        for _ in range(3):
+            send(a, type="message", to="33334444", id="m1", text="hi")
+        send(a, type="message", to="33334444", id="m2", text="yo")
+        assert [recv(b, "message")["id"], recv(b, "message")["id"]] == ["m1", "m2"]
+        assert recv(a, "ack") == {"type": "ack", "status": "sent", "ids": ["m1", "m2"]}
+        assert main.metrics["messages_deduped"] == deduped + 2
+
+        send(b, type="receipt", to="11112222", status="read", ids=["m1", "m2"])
+        receipts = recv(a, "receipts")["receipts"]
+        assert receipts == [{"from": "33334444", "groupCode": None, "status": "read", "ids": ["m1", "m2"]}]
+
+
+def test_undeliverable_message_is_acked_failed_and_retried(client, recv):
+    with client.websocket_connect("/ws/11112222/a") as a:
+        recv(a, "session")
+        deduped = main.metrics["messages_deduped"]
+        send(a, type="message", to="99998888", id="m3", text="lost")
+        assert recv(a, "ack") == {"type": "ack", "status": "failed", "ids": ["m3"]}
+        # ارسال دوباره پیام failed تکراری حساب نمی‌شود و دوباره مسیریابی می‌شود
+        send(a, type="message", to="99998888", id="m3", text="lost")
+        assert recv(a, "ack")["status"] == "failed"
+        assert main.metrics["messages_deduped"] == deduped
+
+
+def test_group_message_is_acked_after_broadcast(client, recv):
+    with client.websocket_connect("/ws/11112222/a") as a, client.websocket_connect("/ws/33334444/b") as b:
+        recv(a, "session")
+        recv(b, "session")
+        send(a, type="group_message", to="G1", id="g1", text="all")
+        assert recv(b, "group_message")["groupCode"] == "G1"
+        assert recv(a, "ack") == {"type": "ack", "status": "sent", "ids": ["g1"]}
+
+
+def test_dedup_window_and_capacity():
+    tracker = DeliveryTracker(window=600, max_ids=2, flush_interval=1)
+    assert tracker.first("a", "1") and tracker.first("a", "2")
+    assert not tracker.first("a", "1")
+    assert tracker.first("b", "1")  # شناسه برای هر فرستنده جداست
+    assert tracker.first("a", "1")  # قدیمی‌ترین با رسیدن به سقف بیرون رفته است
+    assert tracker.status("a", "1") is None
+
+    expiring = DeliveryTracker(window=0, max_ids=10, flush_interval=1)
+    expiring.first("a", "1")
+    assert expiring.first("a", "1")
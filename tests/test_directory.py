@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def people():
+    d = main.UserDirectory(max_matches=100, max_scan=1000)
+    d.build([
+        ("11112222", "علي رضايي", "IR"),
+        ("33334444", "Reza Ahmadi", "IR"),
+        ("55556666", "مریم ۱۲۳", "AF"),
+        ("77778888", "Ali Rezvani", ""),
+    ])
+    return d
+
+
+def codes(result):
+    return [u["code"] for u in result[0]]
+
+
+def test_normalize_name():
+    assert main.normalize_name("علي") == "علی"
+    assert main.normalize_name("كاظم") == "کاظم"
+    assert main.normalize_name("۱۲۳٤") == "1234"
+    assert main.normalize_name("  Reza‌Ahmadi  ") == "reza ahmadi"
+    assert main.normalize_name("مُحَمَّد") == "محمد"
+
+
+def test_prefix_matches_any_name_word_or_code(people):
+    assert codes(people.search("علی")) == ["11112222"]  # شکل عربی در ایندکس یکسان شده
+    assert codes(people.search("رضا")) == ["11112222"]
+    assert sorted(codes(people.search("rez"))) == ["33334444", "77778888"]
+    assert codes(people.search("ali rez")) == ["77778888"]
+    assert codes(people.search("5555")) == ["55556666"]
+    assert codes(people.search("123")) == ["55556666"]
+    assert people.search("zzz") == ([], 0)
+
+
+def test_substring_search(people):
+    assert codes(people.search("hmad", "substring")) == ["33334444"]
+    assert codes(people.search("یمریم", "substring")) == []
+    assert sorted(codes(people.search("ezv", "substring"))) == ["77778888"]
+    # کمتر از سه حرف: همان جستجوی پیشوندی
+    assert codes(people.search("ez", "substring")) == []
+    assert codes(people.search("مر", "substring")) == ["55556666"]
+
+
+def test_pagination_and_total(people):
+    page, total = people.search("r", offset=1, limit=1)
+    assert total == 2 and len(page) == 1
+
+
+def test_substring_scan_is_bounded():
+    d = main.UserDirectory(max_matches=100, max_scan=5)
+    d.build([(f"{i:08d}", f"user name {i}", "") for i in range(50)])
+    users, total = d.search("name", "substring", limit=50)
+    assert total <= 5 and len(users) == total
+
+
+def test_add_remove_rename(people):
+    people.add("99990000", "Sara Karimi")
+    assert codes(people.search("kar")) == ["99990000"]
+    people.add("99990000", "Sara Nouri")  # افزودن دوباره جایگزین نام قبلی است
+    assert people.search("kar") == ([], 0)
+    people.rename("99990000", "12121212")
+    assert codes(people.search("nouri")) == ["12121212"]
+    assert people.get("99990000") is None
+    people.remove("12121212")
+    assert people.search("nouri") == ([], 0)
+    assert not any(c == "12121212" for c in (k[1] for k in people.keys))
+    assert len(people) == 4
+
+
+def test_rate_limiter_window(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: now[0])
+    limiter = main.RateLimiter(2, 10)
+    assert limiter.allow("a") and limiter.allow("a") and not limiter.allow("a")
+    assert limiter.allow("b")
+    assert limiter.retry_after() == 10
+    now[0] += 10
+    assert limiter.allow("a")
+
+
+def test_search_endpoint_requires_live_session(client, recv):
+    r = client.post("/api/register", json={"code": "55556666", "name": "Ali Karimi", "country": "IR", "password": "1234"})
+    assert r.status_code == 200
+    assert client.get("/api/users/search", params={"q": "ali"}).status_code == 403
+    with client.websocket_connect("/ws/11112222/ali") as ws:
+        token = recv(ws, "session")["token"]
+        bad = {"X-User-Code": "11112222", "X-Session-Token": token + "x"}
+        assert client.get("/api/users/search", params={"q": "ali"}, headers=bad).status_code == 403
+        other = {"X-User-Code": "33334444", "X-Session-Token": token}
+        assert client.get("/api/users/search", params={"q": "ali"}, headers=other).status_code == 403
+
+        headers = {"X-User-Code": "11112222", "X-Session-Token": token}
+        r = client.get("/api/users/search", params={"q": "karimi"}, headers=headers)
+        assert r.status_code == 200
+        assert r.json()["users"] == [{"code": "55556666", "name": "Ali Karimi"}]
+        assert client.get("/api/users/search", params={"q": "a"}, headers=headers).status_code == 400
+
+
+def test_search_endpoint_rate_limit(client, recv, monkeypatch):
+    monkeypatch.setattr(main.search_limiter, "rate", 3)
+    monkeypatch.setattr(main.search_limiter, "started", time.monotonic())
+    with client.websocket_connect("/ws/11112222/ali") as ws:
+        headers = {"X-User-Code": "11112222", "X-Session-Token": recv(ws, "session")["token"]}
+        for _ in range(3):
+            assert client.get("/api/users/search", params={"q": "ali"}, headers=headers).status_code == 200
+        r = client.get("/api/users/search", params={"q": "ali"}, headers=headers)
+        assert r.status_code == 429
+        assert int(r.headers["Retry-After"]) >= 1
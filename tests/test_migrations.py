@@ -0,0 +1,54 @@
+import asyncio
+
+import main
+
+
+async def query_plan(sql: str, params=()) -> list:
+    async with main.sqlite_conn.execute("EXPLAIN QUERY PLAN " + sql, params) as cur:
+        return [row[3] for row in await cur.fetchall()]
+
+
+def test_migrations_are_recorded_once(app_env):
+    async def scenario():
+        assert await main.init_db("sqlite")
+        try:
+            assert await main.run_migrations() == main.SCHEMA_VERSION
+            async with main.sqlite_conn.execute("SELECT version FROM schema_version ORDER BY version") as cur:
+                versions = [row[0] for row in await cur.fetchall()]
+            assert versions == [m[0] for m in main.MIGRATIONS]
+        finally:
+            await main.close_db()
+    asyncio.run(scenario())
+
+
+def test_admin_users_page_is_served_by_created_at_index(app_env):
+    async def scenario():
+        assert await main.init_db("sqlite")
+        try:
+            # همان SQL که get_all_users اجرا می‌کند، با پارامترهای جای‌گذاری‌شده
+            statements = []
+            await main.sqlite_conn.set_trace_callback(statements.append)
+            await main.get_all_users(0, 100)
+            await main.sqlite_conn.set_trace_callback(None)
+            sql = next(s for s in statements if "FROM users u" in s)
+            plan = await query_plan(sql)
+        finally:
+            await main.close_db()
+        assert any("idx_users_created_at" in line for line in plan), plan
+        assert not any("USE TEMP B-TREE" in line for line in plan), plan
+    asyncio.run(scenario())
+
+
+def test_ban_expiry_uses_until_time_index(app_env):
+    async def scenario():
+        assert await main.init_db("sqlite")
+        try:
+            _, sql, params, index = next(c for c in main.EXPLAIN_CHECKS if c[0] == "expired_bans")
+            plan = await query_plan(sql, params)
+            results = {r["name"]: r for r in await main.explain_queries()}
+        finally:
+            await main.close_db()
+        assert index == "idx_bans_until_time"
+        assert any(index in line for line in plan), plan
+        assert all(r["ok"] for r in results.values()), results
+    asyncio.run(scenario())
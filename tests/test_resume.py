@@ -0,0 +1,61 @@
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def wait_for(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_abrupt_disconnect_keeps_session_and_queues_messages(client, recv):
+    with client.websocket_connect("/ws/33334444/reza") as b:
+        recv(b, "session")
+        with client.websocket_connect("/ws/11112222/ali") as a:
+            first = recv(a, "session")
+            assert first["resumed"] is False
+            a.close(code=4000)  # قطع غیرعادی؛ کاربر به مهلت resume می‌رود
+            wait_for(lambda: "11112222" in main.sessions.pending)
+
+        b.send_text(json.dumps({"type": "message", "to": "11112222", "id": "m1", "text": "سلام"}))
+        assert recv(b, "ack") == {"type": "ack", "status": "queued", "ids": ["m1"]}
+
+        with client.websocket_connect(f"/ws/11112222/ali?resume={first['token']}") as a2:
+            session = recv(a2, "session")
+            assert session["resumed"] is True and session["resync"] is False
+            assert recv(a2, "message")["id"] == "m1"
+
+
+def test_resume_token_is_bound_to_its_code(client, recv):
+    with client.websocket_connect("/ws/11112222/ali") as a:
+        token = recv(a, "session")["token"]
+        assert main.sessions.check("11112222", token)
+        assert not main.sessions.check("33334444", token)
+        assert not main.sessions.check("11112222", token + "x")
+        assert not main.sessions.check("11112222", "")
+    # بستن عادی (1000) قابل resume نیست و توکن باطل می‌شود
+    wait_for(lambda: not main.sessions.check("11112222", token))
+
+
+def test_state_snapshot_holds_only_token_hashes(app_env):
+    main.STATE_FILE.write_text(json.dumps({
+        "saved_at": time.time(),
+        "users": {
+            "11112222": {"token_hash": main.token_digest("tok-ali"), "name": "ali", "outbox": ['{"type":"x"}']},
+            # توکن خام (قالب قدیمی) پذیرفته نمی‌شود
+            "33334444": {"token": "tok-reza", "name": "reza", "outbox": []},
+        },
+    }), encoding="utf-8")
+    with TestClient(main.app) as c:
+        assert not main.STATE_FILE.exists()
+        assert main.sessions.check("11112222", "tok-ali")
+        assert not main.sessions.check("33334444", "tok-reza")
+        exported = json.dumps(main.sessions.export())
+        assert "tok-ali" not in exported and main.token_digest("tok-ali") in exported
+        with c.websocket_connect("/ws/11112222/ali?resume=tok-ali") as a:
+            assert json.loads(a.receive_text())["resumed"] is True
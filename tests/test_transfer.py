@@ -0,0 +1,123 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def source_db(app_env):
+    """SQLite مبدأ با چند کاربر، دو بن و یک تنظیم تغییرکرده"""
+    async def seed():
+        assert await main.init_db("sqlite")
+        rows = [(f"{i:08d}", f"user {i}", "IR", "h" * 64) for i in range(1, 51)]
+        await main.sqlite_conn.executemany(
+            "INSERT INTO users (code, name, country, password_hash) VALUES (?, ?, ?, ?)", rows)
+        await main.sqlite_conn.commit()
+        await main.ban_user("00000005", 0, "spam")
+        await main.ban_user("00000006", 5, "flood")
+        await main.set_setting("admin_code", "999")
+        await main.close_db()
+    asyncio.run(seed())
+    return app_env
+
+
+def read_counts(db_file):
+    with sqlite3.connect(db_file) as conn:
+        users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        bans = dict(conn.execute("SELECT user_code, reason FROM bans").fetchall())
+        admin = conn.execute("SELECT value FROM settings WHERE key = 'admin_code'").fetchone()[0]
+    return users, bans, admin
+
+
+def test_sqlite_round_trip_through_ndjson(source_db, monkeypatch):
+    dump = source_db / "dump.ndjson"
+    assert main.transfer_cli(["export", "sqlite", str(dump)])
+    footer = main.verify_export(str(dump))
+    assert footer["counts"] == {"user": 51, "ban": 2, "setting": len(main.DEFAULT_SETTINGS)}
+
+    monkeypatch.setattr(main, "DB_FILE", source_db / "target.db")
+    assert main.transfer_cli(["import", str(dump), "sqlite", "7"])
+    assert read_counts(source_db / "target.db") == (51, {"00000005": "spam", "00000006": "flood"}, "999")
+    assert not (source_db / "dump.ndjson.progress").exists()
+
+
+def test_export_opens_source_read_only(source_db):
+    db_file = source_db / "data.db"
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("UPDATE users SET password_hash = 'changed' WHERE code = ?", (main.SUPPORT_CODE,))
+        conn.execute("DELETE FROM settings WHERE key = 'support_password'")
+    assert main.transfer_cli(["export", "sqlite", str(source_db / "dump.ndjson")])
+    with sqlite3.connect(db_file) as conn:
+        # بدون seed تنظیمات و بدون بازنشانی رمز پشتیبانی
+        assert conn.execute("SELECT password_hash FROM users WHERE code = ?", (main.SUPPORT_CODE,)).fetchone()[0] == "changed"
+        assert conn.execute("SELECT COUNT(*) FROM settings WHERE key = 'support_password'").fetchone()[0] == 0
+
+
+def test_export_of_missing_database_fails_without_creating_it(app_env):
+    assert not main.transfer_cli(["export", "sqlite", str(app_env / "dump.ndjson")])
+    assert not (app_env / "data.db").exists()
+
+
+def test_import_resumes_after_a_failed_chunk(source_db, monkeypatch):
+    dump = source_db / "dump.ndjson"
+    assert main.transfer_cli(["export", "sqlite", str(dump)])
+    monkeypatch.setattr(main, "DB_FILE", source_db / "target.db")
+    original = main.write_chunk
+    calls = {"n": 0}
+
+    async def flaky(backend, records):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("boom")
+        await original(backend, records)
+
+    monkeypatch.setattr(main, "write_chunk", flaky)
+    assert not main.transfer_cli(["import", str(dump), "sqlite", "10"])
+    progress = json.loads((source_db / "dump.ndjson.progress").read_text())
+    assert progress["records"] == 20 and progress["target"] == "sqlite"
+    assert main.transfer_cli(["import", str(dump), "sqlite", "10"])
+    assert read_counts(source_db / "target.db")[0] == 51
+
+
+def test_json_backend_round_trip(source_db, monkeypatch):
+    dump = source_db / "dump.ndjson"
+    assert main.transfer_cli(["export", "sqlite", str(dump)])
+    writes = []
+    original = main.save_json
+    monkeypatch.setattr(main, "save_json", lambda: (writes.append(1), original()))
+    assert main.transfer_cli(["import", str(dump), "json", "5"])
+    assert len(writes) == 1  # یک بار در پایان، نه بعد از هر chunk
+    data = json.loads(main.DATA_FILE.read_text(encoding="utf-8"))
+    assert len(data["users"]) == 51
+    assert data["bans"]["00000005"]["is_permanent"] is True and "until" in data["bans"]["00000006"]
+
+    again = source_db / "json.ndjson"
+    assert main.transfer_cli(["export", "json", str(again)])
+    assert main.verify_export(str(again))["counts"] == {"user": 51, "ban": 2, "setting": 0}
+
+
+def test_tampered_or_truncated_files_are_rejected(source_db):
+    dump = source_db / "dump.ndjson"
+    assert main.transfer_cli(["export", "sqlite", str(dump)])
+    lines = dump.read_text(encoding="utf-8").splitlines()
+    tampered = source_db / "tampered.ndjson"
+    tampered.write_text("\n".join([lines[0], lines[1].replace("user", "usr"), *lines[2:]]) + "\n", encoding="utf-8")
+    truncated = source_db / "truncated.ndjson"
+    truncated.write_text("\n".join(lines[:-1]) + "\n", encoding="utf-8")
+    assert main.verify_export(str(tampered)) is None
+    assert main.verify_export(str(truncated)) is None
+    assert not main.transfer_cli(["import", str(tampered), "sqlite"])
+
+
+@pytest.mark.parametrize("args", [
+    ["import", "dump.ndjson", "sqlite", "abc"],
+    ["import", "dump.ndjson", "sqlite", "0"],
+    ["export", "oracle", "dump.ndjson"],
+    ["migrate", "sqlite", "dump.ndjson"],
+])
+def test_bad_arguments_print_usage(app_env, args, capsys):
+    assert not main.transfer_cli(args)
+    assert "usage:" in capsys.readouterr().err